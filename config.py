@@ -18,17 +18,30 @@ GROQ_TEMPERATURE = 0.7  # Controls randomness (0: deterministic, 1: creative)
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT")
 PINECONE_INDEX_NAME = "langchain-bot"
+UPSERT_BATCH_SIZE = 200  # Number of vectors sent per upsert request
+UPSERT_POOL_THREADS = 30  # Number of concurrent upsert requests during indexing
 
 # Embedding model settings
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # SentenceTransformer model
+EMBEDDING_BATCH_SIZE = 128  # Number of texts encoded per forward pass during indexing
 
 # Document processing settings
 DOCUMENT_DIR = "data"  # Directory containing documents to index
 CHUNK_SIZE = 500  # Size of text chunks for processing
 CHUNK_OVERLAP = 20  # Overlap between chunks to maintain context
+PARALLEL_MIN_FILES = 8  # Fewer files than this are parsed in-process instead of in worker processes
+
+# Intent detection settings
+# Run the spaCy keyword/lemma check after regex and fuzzy matching fail
+USE_SPACY_FALLBACK = os.getenv("USE_SPACY_FALLBACK", "false").lower() in ("1", "true", "yes")
 
 # Chat memory settings
 MEMORY_K = 3  # Number of previous exchanges to keep in memory
+REFINER_MAX_CONTEXT_CHARS = 2000  # Maximum conversation log length sent to the query refiner
+
+# Cache settings
+CACHE_TTL = 24 * 60 * 60  # Seconds a cached retrieval or refinement stays valid
+CACHE_MAX_ENTRIES = 1024  # Maximum number of cached results per function
 
 # Application settings
 APP_TITLE = "CyBot - Document Chatbot"
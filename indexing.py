@@ -1,9 +1,4 @@
 import os
-from langchain_community.document_loaders import DirectoryLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
-from pinecone import Pinecone, ServerlessSpec
-from langchain_pinecone import PineconeVectorStore
 from config import (
     PINECONE_API_KEY,
     PINECONE_ENVIRONMENT,
@@ -11,91 +6,100 @@ from config import (
     DOCUMENT_DIR,
     CHUNK_SIZE,
     CHUNK_OVERLAP,
-    EMBEDDING_MODEL
+    EMBEDDING_MODEL,
+    EMBEDDING_BATCH_SIZE,
+    UPSERT_BATCH_SIZE,
+    UPSERT_POOL_THREADS
 )
 
-# Initialize Pinecone
-pc = Pinecone(api_key=PINECONE_API_KEY)
-
+# Document worker processes re-run this module's top level, so the embedding,
+# splitting and Pinecone libraries are only imported inside the functions below
 from utils.preprocessing import process_documents
 
 def load_docs(directory):
     """
-    Load documents from the specified directory using our custom preprocessing
+    Load documents from the specified directory using our custom preprocessing.
+    Documents are yielded as they are processed rather than collected in a list.
     """
-    documents = process_documents(directory)
-    return documents
+    return process_documents(directory)
 
 def split_docs(documents, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
     """
     Split the documents into smaller chunks for better processing
     """
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
     docs = text_splitter.split_documents(documents)
     return docs
 
 def main():
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from langchain_pinecone import PineconeVectorStore
+    from pinecone import Pinecone, ServerlessSpec
+    from pinecone.exceptions import PineconeApiException
+    
     # Directory containing the documents
     directory = DOCUMENT_DIR
     
-    # Load and split documents
-    print("Loading documents...")
+    # Load and split documents; the splitter consumes documents as they are loaded
+    print("Loading and splitting documents...")
     documents = load_docs(directory)
-    print(f"Loaded {len(documents)} documents")
-    
-    print("Splitting documents...")
     docs = split_docs(documents)
     print(f"Split into {len(docs)} chunks")
     
     # Create embeddings
     print("Creating embeddings...")
-    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+    embeddings = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        encode_kwargs={
+            "batch_size": EMBEDDING_BATCH_SIZE,  # Encode many chunks per forward pass
+            "normalize_embeddings": True,
+            "convert_to_numpy": True
+        }
+    )
     
     # Store embeddings in Pinecone
     print("Storing embeddings in Pinecone...")
+    pc = Pinecone(api_key=PINECONE_API_KEY)
     index_name = PINECONE_INDEX_NAME
     
-    # Check if index already exists
-    if index_name not in pc.list_indexes().names():
-        # Create a new index
-        pc.create_index(
-            name=index_name,
-            dimension=384,  # Dimension for all-MiniLM-L6-v2
-            metric="cosine",
-            spec=ServerlessSpec(
-                cloud=PINECONE_ENVIRONMENT.split("-")[0],  # e.g. "aws" from "aws-us-west-2"
-                region="-".join(PINECONE_ENVIRONMENT.split("-")[1:])  # e.g. "us-west-2" from "aws-us-west-2"
+    # Create the index, treating an existing index as success, so no
+    # list_indexes round trip is needed. Without an environment the
+    # index can only be used if it already exists.
+    if PINECONE_ENVIRONMENT:
+        # Serverless spec, e.g. cloud "aws" and region "us-west-2" from "aws-us-west-2"
+        cloud, region = PINECONE_ENVIRONMENT.split("-", 1)
+        try:
+            pc.create_index(
+                name=index_name,
+                dimension=384,  # Dimension for all-MiniLM-L6-v2
+                metric="cosine",
+                spec=ServerlessSpec(cloud=cloud, region=region)
             )
-        )
-    
-    # Get the index instance
-    index = pc.Index(index_name)
+        except PineconeApiException as e:
+            if "ALREADY_EXISTS" not in str(e):
+                raise
     
-    # Use the new PineconeVectorStore to store documents
     texts = [doc.page_content for doc in docs]
     metadatas = [doc.metadata for doc in docs]
+    ids = [f"doc_{i}" for i in range(len(texts))]
     
-    # Create embeddings
-    embeddings_list = embeddings.embed_documents(texts)
-    
-    # Create vector records
-    records = []
-    for i, (text, metadata, embedding) in enumerate(zip(texts, metadatas, embeddings_list)):
-        metadata["text"] = text  # Add text to metadata for retrieval
-        records.append({"id": f"doc_{i}", "values": embedding, "metadata": metadata})
-    
-    # Upsert in batches
-    batch_size = 100
-    for i in range(0, len(records), batch_size):
-        batch = records[i:i + batch_size]
-        index.upsert(batch)
-    
-    # Create a vector store for querying
+    # Open the index by name rather than through from_texts, which looks it
+    # up with another list_indexes call. The index's thread pool lets
+    # add_texts upsert each embedded chunk's batches in parallel.
+    index = pc.Index(index_name, pool_threads=UPSERT_POOL_THREADS)
     vector_store = PineconeVectorStore(
         index=index,
         embedding=embeddings,
         text_key="text"
     )
+    vector_store.add_texts(
+        texts,
+        metadatas=metadatas,
+        ids=ids,
+        batch_size=UPSERT_BATCH_SIZE
+    )
     print("Indexing complete!")
     
     # Example search
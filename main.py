@@ -2,9 +2,6 @@ import os
 import re
 import streamlit as st
 import uuid
-from streamlit_chat import message
-from langchain_groq import ChatGroq
-from langchain.chains import ConversationChain
 from langchain.chains.conversation.memory import ConversationBufferWindowMemory
 from langchain.prompts import (
     SystemMessagePromptTemplate,
@@ -12,8 +9,15 @@ from langchain.prompts import (
     ChatPromptTemplate,
     MessagesPlaceholder
 )
-from utils import query_refiner, find_match, get_conversation_string
-from utils.complaint import ComplaintHandler, IntentRecognizer, ConversationState
+from utils.chat import (
+    refine_and_match,
+    start_retrieval_warmup,
+    find_match,
+    get_conversation_string,
+    update_conversation_string,
+    new_conversation_turns
+)
+from utils.complaint import ComplaintHandler, Intent, IntentRecognizer, ConversationState
 from config import (
     GROQ_API_KEY,
     GROQ_MODEL,
@@ -23,6 +27,13 @@ from config import (
     APP_DESCRIPTION
 )
 
+# Precompiled patterns used to validate complaint details
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_PHONE_CLEAN_RE = re.compile(r'[\s\-\(\)\.]')
+_PHONE_10_RE = re.compile(r'^\d{10}$')
+_PHONE_INTL_RE = re.compile(r'^\+\d{1,3}\d{10}$')
+_HAS_DIGIT_RE = re.compile(r'\d')
+
 # Set page configuration
 st.set_page_config(page_title=APP_TITLE, layout="wide")
 
@@ -87,6 +98,9 @@ with st.sidebar:
 st.markdown("<h1 class='title'>CyBot: Your Smart Assistant</h1>", unsafe_allow_html=True)
 st.subheader(APP_DESCRIPTION)
 
+# Load the embedding model and index in the background while the page renders
+start_retrieval_warmup()
+
 # Initialize session state
 if 'responses' not in st.session_state:
     st.session_state['responses'] = ["How can I assist you?"]
@@ -94,6 +108,10 @@ if 'responses' not in st.session_state:
 if 'requests' not in st.session_state:
     st.session_state['requests'] = []
 
+if 'conversation_turns' not in st.session_state:
+    st.session_state['conversation_turns'] = new_conversation_turns()
+    st.session_state['conversation_string'] = ""
+
 if 'buffer_memory' not in st.session_state:
     st.session_state.buffer_memory = ConversationBufferWindowMemory(k=MEMORY_K, return_messages=True)
     
@@ -132,20 +150,45 @@ prompt_template = ChatPromptTemplate.from_messages([
     human_msg_template
 ])
 
-# Initialize the language model
-llm = ChatGroq(
-    model_name=GROQ_MODEL,
-    groq_api_key=GROQ_API_KEY,
-    temperature=GROQ_TEMPERATURE
-)
+@st.cache_resource
+def get_llm():
+    """
+    Create the language model once per process
+    The Groq integration is imported here so it is only loaded on first use
+    """
+    from langchain_groq import ChatGroq
+    
+    return ChatGroq(
+        model_name=GROQ_MODEL,
+        groq_api_key=GROQ_API_KEY,
+        temperature=GROQ_TEMPERATURE,
+        streaming=True
+    )
 
-# Initialize the conversation chain
-conversation = ConversationChain(
-    memory=st.session_state.buffer_memory,
-    prompt=prompt_template,
-    llm=llm,
-    verbose=True
-)
+def stream_conversation(memory, input_for_llm):
+    """
+    Generate a response with the language model, rendering tokens as they arrive
+    Args:
+        memory: The session's conversation memory
+        input_for_llm: Context and query to send to the language model
+    Returns:
+        The full response text
+    """
+    # Build the prompt from the session's memory so earlier exchanges are included
+    history = memory.load_memory_variables({})
+    messages = prompt_template.format_messages(input=input_for_llm, **history)
+    
+    placeholder = st.empty()
+    chunks = []
+    for chunk in get_llm().stream(messages):
+        chunks.append(chunk.content)
+        placeholder.markdown("".join(chunks))
+    # The full response is shown in the chat history once stored
+    placeholder.empty()
+    
+    response = "".join(chunks)
+    memory.save_context({"input": input_for_llm}, {"response": response})
+    return response
 
 # Define functions for handling complaints
 
@@ -157,9 +200,7 @@ def validate_email(email: str) -> bool:
     Returns:
         Boolean indicating if email is valid
     """
-    # More comprehensive email validation pattern
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
+    return bool(_EMAIL_RE.match(email))
 
 def validate_phone(phone: str) -> bool:
     """
@@ -170,14 +211,12 @@ def validate_phone(phone: str) -> bool:
         Boolean indicating if phone number is valid
     """
     # Clean the phone number of common separators
-    cleaned = re.sub(r'[\s\-\(\)\.]', '', phone)
+    cleaned = _PHONE_CLEAN_RE.sub('', phone)
     
     # Check for valid formats:
     # - 10 digits (standard)
     # - With country code (+1, etc.)
-    if re.match(r'^\d{10}$', cleaned) or re.match(r'^\+\d{1,3}\d{10}$', cleaned):
-        return True
-    return False
+    return bool(_PHONE_10_RE.match(cleaned) or _PHONE_INTL_RE.match(cleaned))
 
 def handle_complaint_filing(query):
     """
@@ -208,14 +247,14 @@ def handle_complaint_filing(query):
     # to track the state of our conversation
     current_field = None
     if session_id in state.active_complaints:
-        current_field = state.active_complaints[session_id].get('current_field')
+        current_field = state.active_complaints[session_id].current_field
       # Get the next field that needs to be filled
     next_field = state.get_next_field(session_id)
     
     # If there's no current field set but we have a next field,
     # we should set the current field for proper tracking
     if not current_field and next_field:
-        state.active_complaints[session_id]['current_field'] = next_field
+        state.active_complaints[session_id].current_field = next_field
         current_field = next_field
     
     # Only process the input if we have a current field we're expecting
@@ -232,7 +271,7 @@ def handle_complaint_filing(query):
             else:
                 # Simple heuristic: if it's short and doesn't contain other fields, it might be a name
                 words = query.strip().split()
-                if 1 <= len(words) <= 3 and '@' not in query and not re.search(r'\d', query):
+                if 1 <= len(words) <= 3 and '@' not in query and not _HAS_DIGIT_RE.search(query):
                     state.update_complaint_data(session_id, 'name', query.strip())
                     input_accepted = True
           # Handle phone field
@@ -272,7 +311,7 @@ def handle_complaint_filing(query):
             
             # Update the current field for next iteration
             if next_field:
-                state.active_complaints[session_id]['current_field'] = next_field
+                state.active_complaints[session_id].current_field = next_field
             
             # Return a response based on the new field
             if next_field == 'phone':
@@ -286,7 +325,7 @@ def handle_complaint_filing(query):
     if next_field is None:  # All fields are filled
         # Submit the complaint
         complaint_data = state.get_complaint_data(session_id)
-        response = ComplaintHandler.create_complaint(complaint_data)
+        response = ComplaintHandler.create_complaint(complaint_data.to_dict())
           # Clear the complaint data
         state.clear_complaint_data(session_id)
         
@@ -352,19 +391,6 @@ with input_container:
             # Store the current query for processing
             original_query = query
             
-            # Refine query if option is selected
-            if refine_query and len(st.session_state['responses']) > 1:
-                conversation_string = get_conversation_string()
-                refined_query = query_refiner(conversation_string, query)
-                # Store the refinement for display in sidebar if enabled
-                st.session_state.query_refinement = {
-                    'original': query,
-                    'refined': refined_query
-                }                # Use the refined query for intent detection
-                query_for_intent = refined_query
-            else:
-                query_for_intent = query
-            
             # First, check if we're in the middle of filing a complaint
             # This should take priority over other checks to avoid interrupting the flow
             if st.session_state.conversation_state.get_complaint_data(st.session_state.session_id):
@@ -372,20 +398,23 @@ with input_container:
             else:
                 # Only check for complaint ID if we're not already in a complaint flow
                 complaint_id = ComplaintHandler.extract_complaint_id(original_query)
-                is_retrieval_intent = IntentRecognizer.is_retrieving_complaint(query_for_intent)
+                intent = IntentRecognizer.classify(original_query, has_complaint_id=bool(complaint_id))
                 
-                # If we have a valid ID and either explicit retrieval intent or complaint context
-                if complaint_id and (is_retrieval_intent or "complaint" in query_for_intent.lower()):
-                    response = handle_complaint_retrieval(original_query)
-                # Check if it's a new complaint-related intent
-                elif IntentRecognizer.is_filing_complaint(query_for_intent):
-                    response = handle_complaint_filing(original_query)  # Use original for data extraction
-                elif is_retrieval_intent:
+                if intent is Intent.RETRIEVE_COMPLAINT:
                     response = handle_complaint_retrieval(original_query)  # Use original for ID extraction
+                elif intent is Intent.FILE_COMPLAINT:
+                    response = handle_complaint_filing(original_query)  # Use original for data extraction
                 else:
-                    # For regular document queries
+                    # For regular document queries, refine the query only now
+                    # so complaint turns never pay for the Groq refinement call
                     if refine_query and len(st.session_state['responses']) > 1:
-                        context = find_match(refined_query)  # Use refined query if available
+                        conversation_string = get_conversation_string(MEMORY_K)
+                        refined_query, context = refine_and_match(conversation_string, query)
+                        # Store the refinement for display in sidebar if enabled
+                        st.session_state.query_refinement = {
+                            'original': query,
+                            'refined': refined_query
+                        }
                         input_for_llm = f"Context:\n {context} \n\n Query:\n{refined_query}"
                     else:
                         context = find_match(query)
@@ -397,21 +426,24 @@ with input_container:
                             st.write(context)
                     
                     # Generate response with context
-                    response = conversation.predict(input=input_for_llm)
+                    response = stream_conversation(st.session_state.buffer_memory, input_for_llm)
             
             # Store the query and response
             st.session_state.requests.append(query)
             st.session_state.responses.append(response)
+            update_conversation_string(query, response)
 
 # Display the conversation
 with response_container:
     st.markdown("<div class='chat-container'>", unsafe_allow_html=True)
     
-    if st.session_state['responses']:
-        for i in range(len(st.session_state['responses'])):
-            message(st.session_state['responses'][i], key=str(i))
-            if i < len(st.session_state['requests']):
-                message(st.session_state["requests"][i], is_user=True, key=str(i) + '_user')
+    # Native chat elements are lighter to render than streamlit_chat components
+    for i, response in enumerate(st.session_state['responses']):
+        with st.chat_message("assistant"):
+            st.markdown(response)
+        if i < len(st.session_state['requests']):
+            with st.chat_message("user"):
+                st.markdown(st.session_state['requests'][i])
     
     st.markdown("</div>", unsafe_allow_html=True)
 
@@ -437,6 +469,8 @@ with st.sidebar:
     if st.button("Reset Conversation"):
         st.session_state['responses'] = ["How can I assist you with your documents today?"]
         st.session_state['requests'] = []
+        st.session_state['conversation_turns'] = new_conversation_turns()
+        st.session_state['conversation_string'] = ""
         st.session_state.buffer_memory.clear()
         # Also clear any active complaint filing process
         st.session_state.conversation_state.clear_complaint_data(st.session_state.session_id)
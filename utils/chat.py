@@ -0,0 +1,186 @@
+import os
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+import torch
+from sentence_transformers import SentenceTransformer
+from pinecone import Pinecone
+import groq
+from config import (
+    GROQ_API_KEY,
+    GROQ_MODEL,
+    GROQ_TEMPERATURE,
+    PINECONE_API_KEY,
+    PINECONE_ENVIRONMENT,
+    PINECONE_INDEX_NAME,
+    EMBEDDING_MODEL,
+    MEMORY_K,
+    REFINER_MAX_CONTEXT_CHARS,
+    CACHE_TTL,
+    CACHE_MAX_ENTRIES
+)
+
+# Background threads for retrieval work that overlaps the Groq calls.
+# Cached functions work without a script run context as long as they
+# do not show a spinner, so nothing here writes to the page.
+_BACKGROUND = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieval")
+
+@st.cache_resource
+def get_groq():
+    """
+    Returns the Groq client, created once and shared across sessions and reruns.
+    """
+    return groq.Client(api_key=GROQ_API_KEY)
+
+@st.cache_resource(show_spinner=False)
+def get_model():
+    """
+    Returns the embedding model, loaded once and shared across sessions and reruns.
+    The model runs in half precision on CUDA and with INT8 dynamically quantized
+    linear layers on CPU. Other devices, such as MPS, keep the FP32 model because
+    dynamic quantization only supports CPU.
+    """
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    if model.device.type == "cuda":
+        return model.half()
+    if model.device.type == "cpu":
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+@st.cache_resource(show_spinner=False)
+def get_index():
+    """
+    Returns the Pinecone index connection, created once and shared across sessions and reruns.
+    """
+    pc = Pinecone(api_key=PINECONE_API_KEY)
+    return pc.Index(PINECONE_INDEX_NAME)
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def query_refiner(conversation, query):
+    """
+    Refines the user query based on the conversation history
+    to make it more relevant for retrieval from the knowledge base.
+    Uses Groq with the llama3-70b model.
+    Results are cached per (conversation, query) pair.
+    """
+    # Hard ceiling on the conversation log sent to the model
+    conversation = conversation[-REFINER_MAX_CONTEXT_CHARS:]
+    response = get_groq().chat.completions.create(
+        model=GROQ_MODEL,
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant that refines user queries to make them more relevant for knowledge base retrieval."},
+            {"role": "user", "content": f"Given the following user query and conversation log, formulate a question that would be the most relevant to provide the user with an answer from a knowledge base.\n\nCONVERSATION LOG: \n{conversation}\n\nQuery: {query}\n\nRefined Query:"}
+        ],
+        temperature=GROQ_TEMPERATURE,
+        max_tokens=256,
+    )
+    return response.choices[0].message.content.strip()
+
+def _warm_up_retrieval():
+    """
+    Loads the embedding model and connects to the Pinecone index
+    so that the next find_match call does not have to.
+    """
+    get_model()
+    get_index()
+
+@st.cache_resource(show_spinner=False)
+def start_retrieval_warmup():
+    """
+    Starts loading the retrieval resources in a background thread,
+    once per process, so the first document query does not wait for them.
+    """
+    _BACKGROUND.submit(_warm_up_retrieval)
+
+def refine_and_match(conversation, query):
+    """
+    Refines the user query while the unrefined query is speculatively
+    retrieved in a background thread, overlapping the Groq round trip with
+    the Pinecone lookup. The speculative context is used when refinement
+    leaves the query unchanged; otherwise the refined query is retrieved.
+    Returns the refined query and its context.
+    """
+    speculative = _BACKGROUND.submit(find_match, query)
+    refined_query = query_refiner(conversation, query)
+    if " ".join(refined_query.lower().split()) == " ".join(query.lower().split()):
+        return refined_query, speculative.result()
+    return refined_query, find_match(refined_query)
+
+@functools.lru_cache(maxsize=512)
+def _encode(text):
+    """
+    Encodes the text with the embedding model. Returns a tuple
+    so repeated queries reuse the embedding without a forward pass.
+    The vector is cast to float32 once, whatever precision the model runs in.
+    """
+    embedding = get_model().encode(text, convert_to_numpy=True, normalize_embeddings=True)
+    return tuple(embedding.astype("float32").tolist())
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _query_index(input):
+    """
+    Encodes the input and returns the combined text of the top matches,
+    or None if no match carries any text. Errors are raised rather
+    than returned so that failed lookups are never cached.
+    """
+    # Encode the input text
+    input_em = list(_encode(input))
+    
+    # Query the Pinecone index with the new API
+    result = get_index().query(
+        vector=input_em,
+        top_k=2,
+        include_metadata=True,
+        include_values=False  # Only the metadata text is used; skip the vectors
+    )
+    
+    # Combine the text from the top 2 matches
+    texts = [
+        match['metadata']['text']
+        for match in result['matches']
+        if 'text' in (match['metadata'] or {})
+    ]
+    return "\n\n".join(texts) if texts else None
+
+def find_match(input):
+    """
+    Finds the most relevant document matches for the given input query
+    using the Pinecone vector index.
+    """
+    try:
+        matched_text = _query_index(input)
+        if matched_text is not None:
+            return matched_text
+    except Exception as e:
+        print(f"Error querying Pinecone index: {str(e)}")
+    
+    return "No relevant information found."
+
+def new_conversation_turns():
+    """
+    Creates an empty buffer for the exchanges included in the conversation string.
+    """
+    return deque(maxlen=MEMORY_K)
+
+def update_conversation_string(query, response):
+    """
+    Appends the latest exchange to the conversation history kept in the
+    Streamlit session state. Only the last MEMORY_K exchanges are kept,
+    matching the window used by the conversation memory.
+    """
+    turns = st.session_state['conversation_turns']
+    turns.append("Human: " + query + "\n" + "Bot: " + response + "\n")
+    st.session_state['conversation_string'] = "".join(turns)
+
+def get_conversation_string(k=MEMORY_K):
+    """
+    Returns the string representation of the last k exchanges
+    of the conversation history from the Streamlit session state.
+    """
+    if k >= MEMORY_K:
+        return st.session_state.get('conversation_string', "")
+    if k <= 0:
+        return ""
+    turns = list(st.session_state.get('conversation_turns', []))
+    return "".join(turns[-k:])
@@ -3,5 +3,5 @@ Initialize the complaint management module for CyBot.
 """
 
 from .handler import ComplaintHandler
-from .intent import IntentRecognizer
-from .state import ConversationState
+from .intent import Intent, IntentRecognizer
+from .state import ComplaintDraft, ConversationState
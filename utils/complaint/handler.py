@@ -3,14 +3,73 @@ Complaint handler module for CyBot.
 Handles the creation and retrieval of complaints through API calls.
 """
 
-import requests
 import re
+import functools
 import os
+import threading
+from collections import defaultdict
+from cachetools import TTLCache
 from typing import Dict, Optional, List, Union
-from datetime import datetime
 
 # API base URL - adjust based on your deployment
 API_BASE_URL = "https://fast-api-bot-samriddha-biswas-projects.vercel.app"
+API_TIMEOUT = 10  # Seconds to wait for the complaints API
+
+@functools.lru_cache(maxsize=1)
+def _get_session():
+    """
+    Create the shared session on the first API call, so requests is not
+    imported until a complaint is filed or retrieved.
+    
+    API calls reuse the session's pooled keep-alive connections. Streamlit
+    runs each browser session's script in its own thread, so concurrent
+    sessions make their calls in parallel from this pool.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.3)
+    ))
+    return session
+
+# Recently retrieved complaints, keyed by complaint ID.
+# Only successful lookups are cached, for a short time.
+_COMPLAINT_CACHE = TTLCache(maxsize=1024, ttl=60)
+_COMPLAINT_CACHE_LOCK = threading.Lock()
+
+# Complaint ID patterns, compiled once at import into a single regex.
+# Each pattern is a lookahead from the start of the text, so the patterns keep
+# their priority order (not leftmost match) and each captures the ID in its own group.
+_COMPLAINT_ID_RE = re.compile('|'.join(r'(?=[\s\S]*?' + pattern + ')' for pattern in (
+    # Match "My complaint ID is XYZ123" or similar
+    r'(?:my|the)\s+complaint\s+id\s+(?:is|was|:)?\s*([A-Z0-9]{6,})',
+    # Match "status of complaint ID: XYZ123" or similar
+    r'status\s+of\s+complaint\s+id\s*[:=]?\s*([A-Z0-9]{6,})',
+    # Match "what happened to my complaint number XYZ123" or similar
+    r'complaint\s+number\s+([A-Z0-9]{6,})',
+    # Standard patterns with word boundaries
+    r'complaint\s+(?:id\s*[:=]?\s*)?([A-Z0-9]{6,})',
+    r'(?:id|complaint id)\s*[:=]?\s*([A-Z0-9]{6,})'
+)), re.IGNORECASE)
+_SIMPLE_ID_RE = re.compile(r'^[A-Z0-9]{6,}$', re.IGNORECASE)
+_ID_WORDS_RE = re.compile(r'\b([A-Z0-9]{6,})\b', re.IGNORECASE)
+_HAS_DIGIT_RE = re.compile(r'[0-9]')
+_HAS_LETTER_RE = re.compile(r'[A-Z]', re.IGNORECASE)
+
+# Display template for complaint details, filled in one format_map call
+_COMPLAINT_DETAILS_TEMPLATE = (
+    "**Complaint ID**: {complaint_id}\n"
+    "**Name**: {name}\n"
+    "**Phone**: {phone_number}\n"
+    "**Email**: {email}\n"
+    "**Details**: {complaint_details}\n"
+    "**Created At**: {created_at}"
+)
 
 class ComplaintHandler:
     """Handles the creation and retrieval of complaints via API."""
@@ -30,8 +89,9 @@ class ComplaintHandler:
             "complaint_details": data.get("details", "")  # Map details to complaint_details
         }
         
+        import requests
         try:
-            response = requests.post(url, json=payload)
+            response = _get_session().post(url, json=payload, timeout=API_TIMEOUT)
             response.raise_for_status()  # Raise exception for error status codes
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -39,12 +99,22 @@ class ComplaintHandler:
     
     @staticmethod
     def get_complaint(complaint_id: str) -> Dict:
-        """Retrieve a complaint by ID"""
+        """Retrieve a complaint by ID, reusing recent successful lookups"""
+        complaint_id = complaint_id.strip()
+        with _COMPLAINT_CACHE_LOCK:
+            complaint = _COMPLAINT_CACHE.get(complaint_id)
+        if complaint is not None:
+            return complaint
+        
         url = f"{API_BASE_URL}/api/complaints/{complaint_id}"
+        import requests
         try:
-            response = requests.get(url)
+            response = _get_session().get(url, timeout=API_TIMEOUT)
             if response.status_code == 200:
-                return response.json()
+                complaint = response.json()
+                with _COMPLAINT_CACHE_LOCK:
+                    _COMPLAINT_CACHE[complaint_id] = complaint
+                return complaint
             elif response.status_code == 404:
                 return {"error": f"Complaint with ID {complaint_id} not found"}
             else:
@@ -53,35 +123,21 @@ class ComplaintHandler:
             return {"error": f"API error: {str(e)}"}
     
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def extract_complaint_id(text: str) -> Optional[str]:
         """Extract complaint ID from text using regex patterns"""
-        # Look for common patterns like "XYZ123", "complaint XYZ123", etc.
-        patterns = [
-            # Match "My complaint ID is XYZ123" or similar
-            r'(?:my|the)\s+complaint\s+id\s+(?:is|was|:)?\s*([A-Z0-9]{6,})',
-            # Match "status of complaint ID: XYZ123" or similar
-            r'status\s+of\s+complaint\s+id\s*[:=]?\s*([A-Z0-9]{6,})',
-            # Match "what happened to my complaint number XYZ123" or similar
-            r'complaint\s+number\s+([A-Z0-9]{6,})',
-            # Standard patterns with word boundaries
-            r'complaint\s+(?:id\s*[:=]?\s*)?([A-Z0-9]{6,})',
-            r'(?:id|complaint id)\s*[:=]?\s*([A-Z0-9]{6,})'
-        ]
-        
         # If the text is just a simple ID format (like 622A9F6E), capture it directly
-        if re.match(r'^[A-Z0-9]{6,}$', text.strip(), re.IGNORECASE):
+        if _SIMPLE_ID_RE.match(text.strip()):
             return text.strip()
         
-        # Try the more specific patterns
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                candidate = match.group(1)
-                return candidate
+        # Try the more specific patterns, like "complaint XYZ123", in one regex call
+        match = _COMPLAINT_ID_RE.match(text)
+        if match:
+            # Only the group of the alternative that matched is set
+            return match.group(match.lastindex)
           # Look for alphanumeric patterns that look like IDs with word boundaries
         # Only look for patterns that contain both letters and numbers
-        id_pattern = r'\b([A-Z0-9]{6,})\b'
-        matches = re.findall(id_pattern, text, re.IGNORECASE)
+        matches = _ID_WORDS_RE.findall(text)
         if matches:
             # Filter out common words that might be mistaken for IDs
             common_words = ["number", "status", "complaint", "details", "everywhere"]
@@ -91,7 +147,7 @@ class ComplaintHandler:
                     continue
                 
                 # Skip if it's not a likely ID (needs to contain at least one digit and one letter)
-                if not (re.search(r'[0-9]', match) and re.search(r'[A-Z]', match, re.IGNORECASE)):
+                if not (_HAS_DIGIT_RE.search(match) and _HAS_LETTER_RE.search(match)):
                     continue
                     
                 return match
@@ -102,20 +158,15 @@ class ComplaintHandler:
     @staticmethod
     def format_complaint_details(complaint: Dict) -> str:
         """Format complaint details for display"""
+        # Fields missing from the complaint are shown as N/A
+        fields = defaultdict(lambda: 'N/A', complaint)
+        if 'complaint_id' not in fields and '_id' in fields:
+            fields['complaint_id'] = fields['_id']
+        
         created_at = complaint.get('created_at', '')
-        if created_at:
-            # Format datetime if needed
-            try:
-                dt = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-                created_at = dt.strftime("%Y-%m-%d %H:%M:%S")
-            except:
-                pass
+        # ISO-8601 timestamps (YYYY-MM-DDTHH:MM:SS...) are shown as YYYY-MM-DD HH:MM:SS
+        if created_at and len(created_at) >= 19 and created_at[10] == 'T':
+            created_at = created_at[:10] + ' ' + created_at[11:19]
+        fields['created_at'] = created_at
         
-        return (
-            f"**Complaint ID**: {complaint.get('complaint_id', complaint.get('_id', 'N/A'))}\n"
-            f"**Name**: {complaint.get('name', 'N/A')}\n"
-            f"**Phone**: {complaint.get('phone_number', 'N/A')}\n"
-            f"**Email**: {complaint.get('email', 'N/A')}\n"
-            f"**Details**: {complaint.get('complaint_details', 'N/A')}\n"
-            f"**Created At**: {created_at}"
-        )
+        return _COMPLAINT_DETAILS_TEMPLATE.format_map(fields)
@@ -4,22 +4,75 @@ Detects user intents using multiple approaches including regex, fuzzy matching,
 """
 
 import re
-from typing import Dict, Tuple, List, Optional
-from rapidfuzz import fuzz, process
-import spacy
+import sys
+import functools
+import importlib.util
+from enum import Enum
+from typing import Dict, Tuple, List, Optional, Set, FrozenSet
+from rapidfuzz import fuzz, process, utils as fuzz_utils
+from config import USE_SPACY_FALLBACK
 
-# Try to load spaCy model, fall back if not available
-try:
-    nlp = spacy.load("en_core_web_sm")
-except:
-    try:
-        # Download if not available
+_SPACY_MODEL = "en_core_web_sm"
+# Pipeline components not needed for token and lemma checks
+_SPACY_DISABLED = ["ner", "parser"]
+_SPACY_UNAVAILABLE_WARNING = "Warning: spaCy model not available. Some NLP features will be limited."
+
+@functools.lru_cache(maxsize=1)
+def _get_nlp():
+    """Load the spaCy model on first use, returning None if it is not available"""
+    if importlib.util.find_spec("spacy") is None:
+        print(_SPACY_UNAVAILABLE_WARNING)
+        return None
+    import spacy
+    
+    # Download the model once if it is not installed
+    if not spacy.util.is_package(_SPACY_MODEL):
         import subprocess
-        subprocess.run(["python", "-m", "spacy", "download", "en_core_web_sm"], check=True)
-        nlp = spacy.load("en_core_web_sm")
-    except:
-        nlp = None
-        print("Warning: spaCy model not available. Some NLP features will be limited.")
+        subprocess.run([sys.executable, "-m", "spacy", "download", _SPACY_MODEL])
+        importlib.invalidate_caches()  # Make the newly installed package importable
+        if not spacy.util.is_package(_SPACY_MODEL):
+            print(_SPACY_UNAVAILABLE_WARNING)
+            return None
+    
+    # A None result is cached too, so an unusable model is not retried on every message
+    try:
+        return spacy.load(_SPACY_MODEL, disable=_SPACY_DISABLED)
+    except OSError:  # e.g. a model version incompatible with the installed spaCy
+        print(_SPACY_UNAVAILABLE_WARNING)
+        return None
+
+@functools.lru_cache(maxsize=2048)
+def _nlp_signals(text: str) -> Optional[Tuple[FrozenSet[str], FrozenSet[str]]]:
+    """Return the token texts and lemmas of the text, or None if spaCy is not available"""
+    nlp = _get_nlp()
+    if nlp is None:
+        return None
+    doc = nlp(text)
+    return frozenset(token.text for token in doc), frozenset(token.lemma_ for token in doc)
+
+# Contact detail patterns, compiled once at import into a single scanner
+# with one named group per field. Email comes first so digits inside an
+# email address are not taken as a phone number.
+_CONTACT_RE = re.compile(
+    r'(?P<email>\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b)'
+    r'|(?P<phone>\b\d{10}\b|\+\d{1,3}\s?\d{10}\b|\(\d{3}\)\s?\d{3}-\d{4})'
+)
+
+@functools.lru_cache(maxsize=4096)
+def _extract_contact_info(text: str) -> Tuple[Tuple[str, str], ...]:
+    """Extract the first email and phone in one pass over the text"""
+    info = {}
+    for match in _CONTACT_RE.finditer(text):
+        info.setdefault(match.lastgroup, match.group(0))
+        if len(info) == 2:
+            break
+    return tuple(info.items())
+
+class Intent(Enum):
+    """User intents handled by the chat pipeline."""
+    FILE_COMPLAINT = "file_complaint"
+    RETRIEVE_COMPLAINT = "retrieve_complaint"
+    DOCUMENT_QUERY = "document_query"
 
 class IntentRecognizer:
     """Recognizes user intents using multiple methods (regex, fuzzy matching, NLP)."""
@@ -30,75 +83,173 @@ class IntentRecognizer:
         "register a complaint", "lodge a complaint", "raise a complaint",
         "complain about", "report an issue", "report a problem",
         "I want to complain", "I need to report", "I have an issue",
-        "I'm having a problem", "not satisfied with", "unhappy with"
+        "I'm having a problem", "not satisfied with", "unhappy with",
+        # Keyword and action verb pairs, covering paraphrases without spaCy
+        "file complaint", "submit complaint", "register complaint",
+        "lodge complaint", "raise complaint", "make complaint",
+        "report problem", "report issue", "raise issue", "raise concern"
     ]
     
     COMPLAINT_RETRIEVAL_EXAMPLES = [
         "show me complaint", "view complaint", "check complaint", 
         "retrieve complaint", "what is my complaint", "where is my complaint",
         "track my complaint", "status of complaint", "complaint status",
-        "find my complaint", "look up my complaint", "see my complaint details"
+        "find my complaint", "look up my complaint", "see my complaint details",
+        # Keyword and retrieval verb pairs, covering paraphrases without spaCy
+        "get complaint", "show ticket", "check ticket", "track ticket",
+        "find ticket", "view case", "check case status", "get complaint status"
     ]
     
-    # Regex patterns
+    # Normalized once (lowercase, punctuation stripped) so fuzzy matching
+    # only has to preprocess the user text on each call
+    _FILING_EXAMPLES_NORMALIZED = [fuzz_utils.default_process(example) for example in COMPLAINT_FILING_EXAMPLES]
+    _RETRIEVAL_EXAMPLES_NORMALIZED = [fuzz_utils.default_process(example) for example in COMPLAINT_RETRIEVAL_EXAMPLES]
+    
+    # Filing examples followed by retrieval examples, scored together in one batch call
+    _ALL_EXAMPLES_NORMALIZED = _FILING_EXAMPLES_NORMALIZED + _RETRIEVAL_EXAMPLES_NORMALIZED
+    _FILING_EXAMPLE_COUNT = len(_FILING_EXAMPLES_NORMALIZED)
+    
+    # Regex patterns, with shared prefixes and suffixes factored out
+    # so each intent is a short alternation
     FILING_PATTERNS = [
-        r'file\s+a\s+complaint',
-        r'submit\s+a\s+complaint',
-        r'make\s+a\s+complaint',
-        r'register\s+a\s+complaint',
-        r'lodge\s+a\s+complaint',
-        r'raise\s+a\s+complaint',
+        r'(?:file|submit|make|register|lodge|raise)\s+a\s+complaint',
         r'complain\s+about',
-        r'report\s+an?\s+issue',
-        r'report\s+a\s+problem'
+        r'report\s+(?:an?\s+issue|a\s+problem)'
     ]
     
     RETRIEVAL_PATTERNS = [
-        r'(get|show|view|check|retrieve)\s+(my\s+)?(details|status|info)?\s*(for|of|about)?\s*(complaint|issue|ticket)',
-        r'(what|where)\s+is\s+(my\s+)?(complaint|issue|ticket)',
-        r'track\s+(my\s+)?(complaint|issue|ticket)',
+        r'(?:get|show|view|check|retrieve)\s+(?:my\s+)?(?:details|status|info)?\s*(?:for|of|about)?\s*(?:complaint|issue|ticket)',
+        r'(?:what|where)\s+is\s+(?:my\s+)?(?:complaint|issue|ticket)',
+        r'track\s+(?:my\s+)?(?:complaint|issue|ticket)',
     ]
     
+    # All regex patterns compiled into one scanner, one named group per intent
+    _KEYWORD_RE = re.compile(
+        '(?P<file_complaint>' + '|'.join(FILING_PATTERNS) + ')'
+        '|(?P<retrieve_complaint>' + '|'.join(RETRIEVAL_PATTERNS) + ')',
+        re.IGNORECASE
+    )
+    
     @classmethod
-    def is_filing_complaint(cls, text: str, threshold: float = 0.7) -> bool:
+    def keyword_intents(cls, text: str) -> Set[Intent]:
+        """
+        Scan the text once with all regex patterns
+        
+        Args:
+            text: User input text
+            
+        Returns:
+            Set of intents whose patterns matched the text
+        """
+        intents = set()
+        for match in cls._KEYWORD_RE.finditer(text):
+            intents.add(Intent(match.lastgroup))
+            # Stop scanning once both complaint intents have been seen
+            if len(intents) == 2:
+                break
+        return intents
+    
+    @classmethod
+    def fuzzy_intents(cls, text: str, threshold: float = 0.7) -> Set[Intent]:
+        """
+        Fuzzy match the text against the examples of both intents at once
+        
+        Args:
+            text: User input text
+            threshold: Threshold for fuzzy matching (0.0-1.0)
+            
+        Returns:
+            Set of intents with an example scoring at or above the threshold
+        """
+        score_cutoff = threshold * 100  # Convert threshold to percentage
+        
+        # One row of scores for all examples; scores below the cutoff are set to 0
+        scores = process.cdist(
+            [fuzz_utils.default_process(text)],
+            cls._ALL_EXAMPLES_NORMALIZED,
+            scorer=fuzz.token_set_ratio,
+            processor=None,
+            score_cutoff=score_cutoff
+        )[0]
+        
+        intents = set()
+        if scores[:cls._FILING_EXAMPLE_COUNT].max() >= score_cutoff:
+            intents.add(Intent.FILE_COMPLAINT)
+        if scores[cls._FILING_EXAMPLE_COUNT:].max() >= score_cutoff:
+            intents.add(Intent.RETRIEVE_COMPLAINT)
+        return intents
+    
+    @classmethod
+    def classify(cls, text: str, has_complaint_id: bool = False, threshold: float = 0.7) -> Intent:
+        """
+        Classify the user intent, scanning the regex patterns only once
+        
+        Args:
+            text: User input text
+            has_complaint_id: Whether a complaint ID was found in the user input
+            threshold: Threshold for fuzzy matching (0.0-1.0)
+            
+        Returns:
+            The detected intent
+        """
+        # Matching is case-insensitive, so normalize the text to share cache entries
+        return cls._classify(text.strip().lower(), has_complaint_id, threshold)
+    
+    @classmethod
+    @functools.lru_cache(maxsize=4096)
+    def _classify(cls, text: str, has_complaint_id: bool, threshold: float) -> Intent:
+        """Classify normalized text, memoizing the result for repeated inputs"""
+        keyword_intents = cls.keyword_intents(text)
+        fuzzy_intents = cls.fuzzy_intents(text, threshold)
+        is_retrieval = cls.is_retrieving_complaint(text, threshold, keyword_intents, fuzzy_intents)
+        
+        # A complaint ID with retrieval intent or complaint context takes priority
+        if has_complaint_id and (is_retrieval or "complaint" in text.lower()):
+            return Intent.RETRIEVE_COMPLAINT
+        if cls.is_filing_complaint(text, threshold, keyword_intents, fuzzy_intents):
+            return Intent.FILE_COMPLAINT
+        if is_retrieval:
+            return Intent.RETRIEVE_COMPLAINT
+        return Intent.DOCUMENT_QUERY
+    
+    @classmethod
+    def is_filing_complaint(cls, text: str, threshold: float = 0.7,
+                            keyword_intents: Optional[Set[Intent]] = None,
+                            fuzzy_intents: Optional[Set[Intent]] = None) -> bool:
         """
         Check if user wants to file a complaint using multiple methods
         
         Args:
             text: User input text
             threshold: Threshold for fuzzy matching (0.0-1.0)
+            keyword_intents: Result of keyword_intents(text), if already computed
+            fuzzy_intents: Result of fuzzy_intents(text, threshold), if already computed
             
         Returns:
             Boolean indicating if filing complaint intent was detected
         """
         # 1. Check with regex (exact matches)
-        for pattern in cls.FILING_PATTERNS:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-          # 2. Try fuzzy matching
-        result = process.extractOne(
-            text.lower(), 
-            cls.COMPLAINT_FILING_EXAMPLES,
-            scorer=fuzz.token_set_ratio
-        )
+        if keyword_intents is None:
+            keyword_intents = cls.keyword_intents(text)
+        if Intent.FILE_COMPLAINT in keyword_intents:
+            return True
+        # 2. Try fuzzy matching
+        if fuzzy_intents is None:
+            fuzzy_intents = cls.fuzzy_intents(text, threshold)
+        if Intent.FILE_COMPLAINT in fuzzy_intents:
+            return True
         
-        if result:
-            # Unpack correctly based on what was returned
-            if len(result) >= 2:  # At minimum we need match and score
-                score = result[1]  # Score is the second element
-                if score >= threshold * 100:  # Convert threshold to percentage
-                    return True
-            
-        # 3. Try NLP intent detection if spaCy is available
-        if nlp:
-            doc = nlp(text.lower())
+        # 3. Try NLP intent detection if enabled and spaCy is available
+        signals = _nlp_signals(text.lower()) if USE_SPACY_FALLBACK else None
+        if signals:
+            tokens, lemmas = signals
             
             # Check for complaint-related keywords and verbs indicating action
             filing_keywords = ["complaint", "report", "issue", "problem", "concern"]
             action_verbs = ["file", "submit", "make", "register", "lodge", "raise"]
             
-            has_filing_keyword = any(token.text in filing_keywords for token in doc)
-            has_action_verb = any(token.lemma_ in action_verbs for token in doc)
+            has_filing_keyword = not tokens.isdisjoint(filing_keywords)
+            has_action_verb = not lemmas.isdisjoint(action_verbs)
             
             if has_filing_keyword and has_action_verb:
                 return True
@@ -106,45 +257,43 @@ class IntentRecognizer:
         return False
     
     @classmethod
-    def is_retrieving_complaint(cls, text: str, threshold: float = 0.7) -> bool:
+    def is_retrieving_complaint(cls, text: str, threshold: float = 0.7,
+                                keyword_intents: Optional[Set[Intent]] = None,
+                                fuzzy_intents: Optional[Set[Intent]] = None) -> bool:
         """
         Check if user wants to retrieve complaint details using multiple methods
         
         Args:
             text: User input text
             threshold: Threshold for fuzzy matching (0.0-1.0)
+            keyword_intents: Result of keyword_intents(text), if already computed
+            fuzzy_intents: Result of fuzzy_intents(text, threshold), if already computed
             
         Returns:
             Boolean indicating if retrieving complaint intent was detected
         """
         # 1. Check with regex (exact matches)
-        for pattern in cls.RETRIEVAL_PATTERNS:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-          # 2. Try fuzzy matching
-        result = process.extractOne(
-            text.lower(), 
-            cls.COMPLAINT_RETRIEVAL_EXAMPLES,
-            scorer=fuzz.token_set_ratio
-        )
+        if keyword_intents is None:
+            keyword_intents = cls.keyword_intents(text)
+        if Intent.RETRIEVE_COMPLAINT in keyword_intents:
+            return True
+        # 2. Try fuzzy matching
+        if fuzzy_intents is None:
+            fuzzy_intents = cls.fuzzy_intents(text, threshold)
+        if Intent.RETRIEVE_COMPLAINT in fuzzy_intents:
+            return True
         
-        if result:
-            # Unpack correctly based on what was returned
-            if len(result) >= 2:  # At minimum we need match and score
-                score = result[1]  # Score is the second element
-                if score >= threshold * 100:  # Convert threshold to percentage
-                    return True
-            
-        # 3. Try NLP intent detection if spaCy is available
-        if nlp:
-            doc = nlp(text.lower())
+        # 3. Try NLP intent detection if enabled and spaCy is available
+        signals = _nlp_signals(text.lower()) if USE_SPACY_FALLBACK else None
+        if signals:
+            tokens, lemmas = signals
             
             # Check for retrieval-related keywords and verbs
             retrieval_keywords = ["complaint", "ticket", "case", "issue", "status"]
             retrieval_verbs = ["show", "see", "find", "get", "check", "track", "view", "retrieve"]
             
-            has_retrieval_keyword = any(token.text in retrieval_keywords for token in doc)
-            has_retrieval_verb = any(token.lemma_ in retrieval_verbs for token in doc)
+            has_retrieval_keyword = not tokens.isdisjoint(retrieval_keywords)
+            has_retrieval_verb = not lemmas.isdisjoint(retrieval_verbs)
             
             if has_retrieval_keyword and has_retrieval_verb:
                 return True
@@ -154,18 +303,5 @@ class IntentRecognizer:
     @staticmethod
     def extract_complaint_info(text: str) -> Dict[str, str]:
         """Extract complaint information from text"""
-        info = {}
-        
-        # Extract email
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        email_match = re.search(email_pattern, text)
-        if email_match:
-            info['email'] = email_match.group(0)
-        
-        # Extract phone
-        phone_pattern = r'\b\d{10}\b|\+\d{1,3}\s?\d{10}\b|\(\d{3}\)\s?\d{3}-\d{4}'
-        phone_match = re.search(phone_pattern, text)
-        if phone_match:
-            info['phone'] = phone_match.group(0)
-            
-        return info
+        # Copy the cached result so callers can modify their own dictionary
+        return dict(_extract_contact_info(text))
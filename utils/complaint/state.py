@@ -8,32 +8,59 @@ import uuid
 import json
 import os
 
+# Complaint fields collected from the user, in the order they are asked for
+REQUIRED_FIELDS = ("name", "phone", "email", "details")
+
+# One bit per required field, set once the field has a value
+_FIELD_BITS = {field: 1 << i for i, field in enumerate(REQUIRED_FIELDS)}
+_ALL_FIELDS_MASK = (1 << len(REQUIRED_FIELDS)) - 1
+
+class ComplaintDraft:
+    """Complaint details collected so far for one session."""
+    
+    # Slots keep per-session drafts small and attribute access fast
+    __slots__ = ("name", "phone", "email", "details", "current_field", "filled_mask")
+    
+    def __init__(self):
+        self.name: Optional[str] = None
+        self.phone: Optional[str] = None
+        self.email: Optional[str] = None
+        self.details: Optional[str] = None
+        self.current_field: Optional[str] = "name"
+        self.filled_mask: int = 0  # Bits from _FIELD_BITS for the fields with a value
+    
+    def to_dict(self) -> Dict:
+        """Return the collected complaint fields as a dictionary"""
+        return {field: getattr(self, field) for field in REQUIRED_FIELDS}
+
 class ConversationState:
     """Manages the state of complaint-related conversations."""
     
     def __init__(self):
-        self.active_complaints = {}  # session_id -> complaint data
+        self.active_complaints = {}  # session_id -> ComplaintDraft
     
-    def start_complaint_filing(self, session_id: str) -> Dict:
+    def start_complaint_filing(self, session_id: str) -> ComplaintDraft:
         """Initialize a new complaint filing process"""
-        self.active_complaints[session_id] = {
-            "name": None,
-            "phone": None,
-            "email": None,
-            "details": None,
-            "current_field": "name"
-        }
+        self.active_complaints[session_id] = ComplaintDraft()
         return self.active_complaints[session_id]
     
-    def update_complaint_data(self, session_id: str, field: str, value: str) -> Dict:
+    def update_complaint_data(self, session_id: str, field: str, value: str) -> ComplaintDraft:
         """Update a field in the complaint data"""
         if session_id not in self.active_complaints:
             self.start_complaint_filing(session_id)
         
-        self.active_complaints[session_id][field] = value
-        return self.active_complaints[session_id]
+        draft = self.active_complaints[session_id]
+        setattr(draft, field, value)
+        
+        # Keep the filled-field mask in sync with the value
+        bit = _FIELD_BITS.get(field, 0)
+        if value:
+            draft.filled_mask |= bit
+        else:
+            draft.filled_mask &= ~bit
+        return draft
     
-    def get_complaint_data(self, session_id: str) -> Optional[Dict]:
+    def get_complaint_data(self, session_id: str) -> Optional[ComplaintDraft]:
         """Get current complaint data"""
         return self.active_complaints.get(session_id)
     
@@ -42,14 +69,12 @@ class ConversationState:
         if session_id not in self.active_complaints:
             return None
         
-        data = self.active_complaints[session_id]
-        required_fields = ["name", "phone", "email", "details"]
-        
-        for field in required_fields:
-            if not data.get(field):
-                return field
+        missing = ~self.active_complaints[session_id].filled_mask & _ALL_FIELDS_MASK
+        if not missing:
+            return None
         
-        return None
+        # The lowest missing bit is the first unfilled field in order
+        return REQUIRED_FIELDS[(missing & -missing).bit_length() - 1]
     
     def clear_complaint_data(self, session_id: str) -> None:
         """Clear complaint data after submission"""
@@ -61,5 +86,4 @@ class ConversationState:
         if session_id not in self.active_complaints:
             return False
         
-        data = self.active_complaints[session_id]
-        return all(data.get(field) for field in ["name", "phone", "email", "details"])
+        return self.active_complaints[session_id].filled_mask == _ALL_FIELDS_MASK
@@ -6,19 +6,28 @@ before indexing them for the chatbot.
 """
 
 import os
-import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    Docx2txtLoader,
-    UnstructuredMarkdownLoader,
-    UnstructuredHTMLLoader,
-    CSVLoader,
-    UnstructuredExcelLoader
-)
+from config import PARALLEL_MIN_FILES
+
+# Name of the LangChain document loader for each supported file extension.
+# Loaders are imported by name when first needed, so only the parsers for
+# the file types actually present are loaded.
+_LOADERS = {
+    '.pdf': 'PyPDFLoader',
+    '.txt': 'TextLoader',
+    '.docx': 'Docx2txtLoader',
+    '.doc': 'Docx2txtLoader',
+    '.md': 'UnstructuredMarkdownLoader',
+    '.html': 'UnstructuredHTMLLoader',
+    '.htm': 'UnstructuredHTMLLoader',
+    '.csv': 'CSVLoader',
+    '.xlsx': 'UnstructuredExcelLoader',
+    '.xls': 'UnstructuredExcelLoader'
+}
 
 def get_file_loader(file_path: str):
     """
@@ -30,25 +39,13 @@ def get_file_loader(file_path: str):
     Returns:
         A LangChain document loader instance
     """
+    from langchain_community import document_loaders
+    
     file_extension = Path(file_path).suffix.lower()
     
-    if file_extension == '.pdf':
-        return PyPDFLoader(file_path)
-    elif file_extension == '.txt':
-        return TextLoader(file_path)
-    elif file_extension in ['.docx', '.doc']:
-        return Docx2txtLoader(file_path)
-    elif file_extension == '.md':
-        return UnstructuredMarkdownLoader(file_path)
-    elif file_extension in ['.html', '.htm']:
-        return UnstructuredHTMLLoader(file_path)
-    elif file_extension == '.csv':
-        return CSVLoader(file_path)
-    elif file_extension in ['.xlsx', '.xls']:
-        return UnstructuredExcelLoader(file_path)
-    else:
-        # Default to text loader for unknown types
-        return TextLoader(file_path)
+    # Default to text loader for unknown types
+    loader_class = getattr(document_loaders, _LOADERS.get(file_extension, 'TextLoader'))
+    return loader_class(file_path)
 
 def load_document(file_path: str) -> List[Dict[str, Any]]:
     """
@@ -80,38 +77,86 @@ def clean_text(text: str) -> str:
         Cleaned text
     """
     # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = ' '.join(text.split())
     
     # Remove special characters that might cause issues
-    text = re.sub(r'[^\x00-\x7F]+', '', text)
+    return text.encode('ascii', 'ignore').decode('ascii')
+
+def iter_document_paths(directory: str) -> Iterator[str]:
+    """
+    Recursively find files with a supported extension.
+    
+    Args:
+        directory: Directory to search
+        
+    Yields:
+        Paths of files that have a document loader
+    """
+    # Skip directories that cannot be read, as os.walk does, so one bad
+    # directory does not stop the whole indexing run
+    try:
+        entries = os.scandir(directory)
+    except OSError as e:
+        print(f"Error reading directory {directory}: {e}")
+        return
     
-    return text
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_document_paths(entry.path)
+            elif entry.is_file() and Path(entry.name).suffix.lower() in _LOADERS:
+                yield entry.path
 
-def process_documents(directory: str) -> List[Dict[str, Any]]:
+def _process_file(file_path: str) -> List[Dict[str, Any]]:
     """
-    Process all documents in a directory.
+    Load and clean a single document. Runs in a worker process.
     
     Args:
-        directory: Directory containing documents
+        file_path: Path to the document file
         
     Returns:
-        List of all document chunks with metadata
+        List of cleaned document chunks, empty if the file could not be processed
     """
-    all_docs = []
+    try:
+        docs = load_document(file_path)
+        
+        # Clean text content
+        for doc in docs:
+            doc.page_content = clean_text(doc.page_content)
+        
+        print(f"Processed {file_path}: {len(docs)} chunks")
+        return docs
+    except Exception as e:
+        print(f"Error processing {file_path}: {e}")
+        return []
+
+def process_documents(directory: str, max_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Process all supported documents in a directory, parsing files in parallel
+    worker processes when there are enough of them. Files without a supported
+    extension are skipped.
+    
+    Args:
+        directory: Directory containing documents
+        max_workers: Maximum number of worker processes (defaults to the CPU count)
+        
+    Yields:
+        Document chunks with metadata, file by file in directory scan order
+    """
+    file_paths = list(iter_document_paths(directory))
+    
+    # Each spawned worker starts a fresh interpreter and imports the loaders,
+    # which costs more than parsing a handful of files in this process
+    if len(file_paths) < PARALLEL_MIN_FILES:
+        for file_path in file_paths:
+            yield from _process_file(file_path)
+        return
     
-    for root, _, files in os.walk(directory):
-        for file in files:
-            file_path = os.path.join(root, file)
-            try:
-                docs = load_document(file_path)
-                
-                # Clean text content
-                for doc in docs:
-                    doc.page_content = clean_text(doc.page_content)
-                
-                all_docs.extend(docs)
-                print(f"Processed {file_path}: {len(docs)} chunks")
-            except Exception as e:
-                print(f"Error processing {file_path}: {e}")
+    max_workers = min(max_workers or os.cpu_count() or 1, len(file_paths))
     
-    return all_docs
+    # "spawn" avoids forking state that some document parsers are not safe to share
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        # map keeps the file order so document IDs stay stable between runs
+        for docs in executor.map(_process_file, file_paths):
+            yield from docs